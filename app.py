@@ -1,7 +1,11 @@
 import os
+import json
+import re
+import hashlib
 import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output
+from flask import Response, request
 import pandas as pd
 import plotly.express as px
 
@@ -11,6 +15,40 @@ app.title = "Dashboard Layout"
 
 server = app.server
 
+# Manifest of the vendored images written by build_assets.py
+ASSET_MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'img', 'manifest.json')
+ASSET_NAMES = ['logo', 'overview-banner', 'about-banner']
+ASSET_MANIFEST = {}
+if os.path.exists(ASSET_MANIFEST_PATH):
+    with open(ASSET_MANIFEST_PATH) as manifest_file:
+        ASSET_MANIFEST = json.load(manifest_file)
+
+# Build the images on startup if they are missing, so pages never hot-link the remote hosts
+# (a failed build stops the app instead of silently falling back to the remote URLs)
+if any(name not in ASSET_MANIFEST for name in ASSET_NAMES):
+    import build_assets
+    ASSET_MANIFEST = build_assets.build_assets()
+
+# Fingerprinted asset files (name.<content hash>.ext) never change, so they can be cached for a year
+FINGERPRINTED_ASSET = re.compile(r'\.[0-9a-f]{12}\.[a-z0-9]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Function to get the Img properties of a vendored image
+def asset_image_props(name, sizes='100vw'):
+    entry = ASSET_MANIFEST[name]
+    props = {'src': app.get_asset_url('img/' + entry['src'])}
+    if entry.get('srcset'):
+        props['srcSet'] = ', '.join(f"{app.get_asset_url('img/' + filename)} {width}w" for filename, width in entry['srcset'])
+        props['sizes'] = sizes
+    return props
+
+# Add long-lived cache headers to fingerprinted assets
+@server.after_request
+def add_asset_cache_headers(response):
+    if request.path.startswith(app.get_asset_url('')) and FINGERPRINTED_ASSET.search(request.path) and response.status_code in (200, 304):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
 # URL of the Excel file on GitHub
 url1 = 'https://github.com/dogitosanchez/livrable/raw/main/aGLP1_english.xlsx'
 url2 = 'https://github.com/dogitosanchez/livrable/raw/main/Insuline_anglais.xlsx'
@@ -23,6 +61,50 @@ cleaned_data2 = pd.read_excel(url2, sheet_name='Complet')
 cleaned_data['Year'] = pd.to_datetime(cleaned_data['Notif'], errors='coerce', dayfirst=True).dt.year.fillna(0).astype(int)
 cleaned_data2['Year'] = pd.to_datetime(cleaned_data2['Notif'], dayfirst=True).dt.year
 
+# Common column names used by the stacked table (aGLP-1 and Insulin files use different headers)
+STACKED_COLUMNS = ['Product', 'Year', 'Collection Method', 'Declaration Type', 'Type of Case', 'Sex']
+
+# Harmonize labels that are spelled differently between the two files
+LABEL_FIXES = {
+    'Ministry of Portal': 'Ministry Portal',
+    'Ministry of Portal - SAS': 'Ministry Portal - SAS',
+    'Medicament Error': 'Medication Error',
+    'Medicament Error without Secondary Effects': 'Medication Error Without Adverse Effect',
+}
+
+# Function to stack one product frame into the common columnar schema
+def to_stacked_frame(data, product, renames):
+    frame = data.rename(columns=renames)
+    frame = pd.DataFrame({
+        'Product': product,
+        'Year': pd.to_datetime(frame['Notif'], errors='coerce', dayfirst=True).dt.year.astype('Int64'),
+        'Collection Method': frame['Collection Method'],
+        'Declaration Type': frame['Declaration Type'],
+        'Type of Case': frame['Type of Case'],
+        'Sex': frame['Sex'],
+    }, columns=STACKED_COLUMNS)
+    for column in ['Collection Method', 'Declaration Type', 'Type of Case']:
+        frame[column] = frame[column].str.strip().replace(LABEL_FIXES)
+    return frame
+
+# Stack both products into a single table with a 'Product' key
+stacked_data = pd.concat([
+    to_stacked_frame(cleaned_data2, 'Insulin', {'Typ Cas': 'Type of Case'}),
+    to_stacked_frame(cleaned_data, 'aGLP-1', {'Collection Mode': 'Collection Method'}),
+], ignore_index=True)
+for column in ['Product', 'Collection Method', 'Declaration Type', 'Type of Case', 'Sex']:
+    stacked_data[column] = stacked_data[column].astype('category')
+
+# Version of the loaded data, used as cache key so cached aggregates follow the data
+DATASET_VERSION = hashlib.sha1(pd.util.hash_pandas_object(stacked_data, index=False).values.tobytes()).hexdigest()[:12]
+
+# Values accepted by the API filters, as plain sets so requests never touch pandas
+ALLOWED_PRODUCTS = frozenset(stacked_data['Product'].cat.categories)
+ALLOWED_SEXES = frozenset(stacked_data['Sex'].cat.categories)
+
+# Colors used for each product in the comparison charts
+PRODUCT_COLORS = {'Insulin': 'lightcoral', 'aGLP-1': 'rgb(0, 118, 186)'}
+
 # Load the Excel file
 df = pd.read_excel(url1, sheet_name='Complet')
 
@@ -223,6 +305,71 @@ def create_plotly_declaration_graph():
 
     return fig
 
+# Function to compute the comparison aggregates with a single groupby over the stacked table
+def compute_comparison_aggregates(data):
+    counts = data.groupby(
+        ['Product', 'Year', 'Collection Method', 'Declaration Type', 'Type of Case', 'Sex'],
+        observed=True, dropna=False
+    ).size().rename('Number of cases')
+
+    # Cases per year for each product
+    per_year = counts.groupby(level=['Product', 'Year'], observed=True).sum().reset_index()
+    per_year = per_year.dropna(subset=['Year'])
+
+    # Share of each collection method within each product
+    per_method = counts.groupby(level=['Product', 'Collection Method'], observed=True).sum().reset_index()
+    per_method = per_method.dropna(subset=['Collection Method'])
+    per_method['Share (%)'] = 100 * per_method['Number of cases'] / per_method.groupby('Product', observed=True)['Number of cases'].transform('sum')
+
+    # Type of case by sex for each product
+    per_case_sex = counts.groupby(level=['Product', 'Type of Case', 'Sex'], observed=True).sum().reset_index()
+    per_case_sex = per_case_sex.dropna(subset=['Type of Case', 'Sex'])
+
+    # Keep the full count table so the JSON API can filter and regroup it
+    return {'counts': counts, 'per_year': per_year, 'per_method': per_method, 'per_case_sex': per_case_sex}
+
+# Function to generate the line graph of cases per year for both products
+def create_plotly_comparison_line_graph(aggregates):
+    fig = px.line(aggregates['per_year'], x='Year', y='Number of cases', color='Product', markers=True,
+                  color_discrete_map=PRODUCT_COLORS,
+                  title='Number of cases per year: Insulin vs aGLP-1')
+
+    fig.update_traces(marker=dict(size=10))
+
+    fig.update_layout(xaxis_title='Year', yaxis_title='Number of cases',
+                      title={'x': 0.5, 'xanchor': 'center'},  # Center the title
+                      height=500, autosize=True)
+
+    return fig
+
+# Function to generate the bar chart of collection method shares for both products
+def create_plotly_comparison_method_graph(aggregates):
+    fig = px.bar(aggregates['per_method'], x='Collection Method', y='Share (%)', color='Product',
+                 color_discrete_map=PRODUCT_COLORS, barmode='group',
+                 hover_data=['Number of cases'],
+                 title='Share of cases by method of collection: Insulin vs aGLP-1')
+
+    fig.update_layout(xaxis_title='Method of collection', yaxis_title='Share of cases (%)',
+                      title={'x': 0.5, 'xanchor': 'center'},  # Center the title
+                      height=500, autosize=True,
+                      xaxis=dict(tickangle=-30))  # Tilt x-axis labels
+
+    return fig
+
+# Function to generate the bar chart of case type by sex for both products
+def create_plotly_comparison_case_sex_graph(aggregates):
+    fig = px.bar(aggregates['per_case_sex'], x='Type of Case', y='Number of cases', color='Sex',
+                 facet_col='Product', barmode='group',
+                 title='Incidents per Type of Case and Sex: Insulin vs aGLP-1')
+
+    fig.update_layout(yaxis_title='Number of incidents',
+                      title={'x': 0.5, 'xanchor': 'center'},  # Center the title
+                      height=600, autosize=True,
+                      legend_title_text='Sex')
+    fig.update_xaxes(title_text='Type of Case', tickangle=-30)
+
+    return fig
+
 # Function to create value boxes in a 2x2 grid layout
 def create_value_boxes_insuline():
     return html.Div([
@@ -289,7 +436,7 @@ def create_value_boxes():
 app.layout = html.Div([
     # Top bar with image and title
     html.Div([
-        html.Img(src='https://ilis.univ-lille.fr/_assets/cf96958808510cb4a29e461391f0eb9e/assets/img/logo-topbar.svg', 
+        html.Img(**asset_image_props('logo'),
                  style={'height': '30px', 'marginRight': '0px'}),
         html.H1(
             "Insulin/aGLP-1 autoinjectors and the difficulties encountered during injection as well as the adverse effects", 
@@ -417,6 +564,38 @@ app.layout = html.Div([
                             'fontSize': '22px'
                         }
                     ),
+                    dcc.Tab(
+                        label='Comparison', 
+                        value='tab-comparison', 
+                        style={
+                            'backgroundColor': 'rgb(53, 53, 53)', 
+                            'color': 'white', 
+                            'textAlign': 'center', 
+                            'height': '40px', 
+                            'lineHeight': '40px',
+                            'width': '160px',  
+                            'borderRadius': '8px',
+                            'padding': '0px',
+                            'margin': '10px auto',  
+                            'boxSizing': 'border-box',
+                            'border': 'none',
+                            'fontSize': '20px'
+                        }, 
+                        selected_style={
+                            'backgroundColor': 'rgb(0, 118, 186)', 
+                            'color': 'white', 
+                            'textAlign': 'center', 
+                            'height': '40px', 
+                            'lineHeight': '40px',
+                            'width': '160px',
+                            'borderRadius': '8px',
+                            'padding': '0px',
+                            'margin': '10px auto',  
+                            'boxSizing': 'border-box',
+                            'border': 'none',
+                            'fontSize': '22px'
+                        }
+                    ),
                     dcc.Tab(
                         label='About', 
                         value='tab-about', 
@@ -492,6 +671,112 @@ agl_fig = create_plotly_line_graph_cached()
 
 # In the callback or when rendering the insulin graph
 insulin_fig = create_plotly_insulin_line_graph_cached()
+
+# Cache the comparison aggregates per dataset version (the key changes with the data, so entries never expire)
+@cache.memoize(timeout=0)
+def compute_comparison_aggregates_cached(dataset_version):
+    return compute_comparison_aggregates(stacked_data)
+
+# Aggregates served by the JSON API, with the columns they are grouped by
+API_AGGREGATES = {
+    'cases-per-year': ['Product', 'Year'],
+    'declaration-types': ['Product', 'Declaration Type'],
+    'collection-methods': ['Product', 'Collection Method'],
+    'case-types-by-sex': ['Product', 'Type of Case', 'Sex'],
+}
+
+# Cache-Control header for API responses (clients revalidate with the ETag once it expires)
+API_CACHE_CONTROL = 'public, max-age=300, must-revalidate'
+
+# Function to build a JSON error response for the API
+def api_error(message, status):
+    return Response(json.dumps({'error': message}), status=status, mimetype='application/json')
+
+# Function to read the optional filters (product, sex, year_from, year_to) from the query string
+def parse_api_filters(args):
+    filters = {}
+    for name, allowed in [('product', ALLOWED_PRODUCTS), ('sex', ALLOWED_SEXES)]:
+        if args.get(name):
+            if args.get(name) not in allowed:
+                raise ValueError(f"'{name}' must be one of: {', '.join(sorted(allowed))}")
+            filters[name] = args.get(name)
+    for name in ['year_from', 'year_to']:
+        if args.get(name):
+            try:
+                filters[name] = int(args.get(name))
+            except ValueError:
+                raise ValueError(f"'{name}' must be an integer year")
+    return filters
+
+# Function to filter the precomputed counts and regroup them for one API aggregate
+def compute_api_payload(aggregate, filters):
+    counts = compute_comparison_aggregates_cached(DATASET_VERSION)['counts'].reset_index()
+
+    if 'product' in filters:
+        counts = counts[counts['Product'] == filters['product']]
+    if 'sex' in filters:
+        counts = counts[counts['Sex'] == filters['sex']]
+    if 'year_from' in filters:
+        counts = counts[counts['Year'] >= filters['year_from']]
+    if 'year_to' in filters:
+        counts = counts[counts['Year'] <= filters['year_to']]
+
+    # Rows with a missing value are kept under a null key, so every aggregate has the same total
+    columns = API_AGGREGATES[aggregate]
+    grouped = counts.groupby(columns, observed=True, dropna=False)['Number of cases'].sum().reset_index()
+
+    return {
+        'dataset_version': DATASET_VERSION,
+        'aggregate': aggregate,
+        'filters': filters,
+        'data': json.loads(grouped.to_json(orient='records')),
+    }
+
+# Function to build a cacheable API response, answering 304 when the client already has this ETag
+def api_response(etag, build_body):
+    # If-None-Match uses weak comparison, so ETags weakened by proxies still match
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(build_body(), mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = API_CACHE_CONTROL
+    response.headers['X-Dataset-Version'] = DATASET_VERSION
+    return response
+
+# Cache the serialized API responses per dataset version and filters (the key changes with the data, so entries never expire)
+@cache.memoize(timeout=0)
+def compute_api_body_cached(dataset_version, aggregate, filters_key):
+    return json.dumps(compute_api_payload(aggregate, json.loads(filters_key)))
+
+# Read-only JSON API serving the same aggregates as the charts
+@server.route('/api/v1/aggregates/<aggregate>')
+def serve_api_aggregate(aggregate):
+    if aggregate not in API_AGGREGATES:
+        return api_error(f"Unknown aggregate '{aggregate}'", 404)
+    try:
+        filters = parse_api_filters(request.args)
+    except ValueError as error:
+        return api_error(str(error), 400)
+
+    # The response only depends on the dataset version, the aggregate and the filters,
+    # so the ETag can be checked before anything is computed
+    filters_key = json.dumps(filters, sort_keys=True)
+    etag = hashlib.sha1(f'{DATASET_VERSION}/{aggregate}/{filters_key}'.encode()).hexdigest()
+
+    return api_response(etag, lambda: compute_api_body_cached(DATASET_VERSION, aggregate, filters_key))
+
+# Index of the available API aggregates
+@server.route('/api/v1/aggregates')
+def serve_api_index():
+    etag = hashlib.sha1(f'{DATASET_VERSION}/index'.encode()).hexdigest()
+    return api_response(etag, lambda: json.dumps({
+        'dataset_version': DATASET_VERSION,
+        'aggregates': list(API_AGGREGATES),
+        'filters': ['product', 'sex', 'year_from', 'year_to'],
+        'missing_values': 'Cases with a missing year, sex or category are counted under a null key',
+    }))
+
 # Callbacks to update the content based on the selected tab
 @app.callback(
     Output('tabs-content', 'children'),
@@ -501,7 +786,7 @@ def render_content(tab):
     if tab == 'tab-presentation':
         return html.Div([
             html.Img(
-                src='https://www.diabeteswellness.no/media/wdcofqsq/injection-pen-with-needle.jpg?center=0.673146441088387,0.489979936985788&mode=crop&width=1200&height=630&rnd=133644018985000000', 
+                **asset_image_props('overview-banner', sizes='85vw'),
                 style={'width': '100%', 'height': '400px', 'objectFit': 'cover', 'marginBottom': '50px'}  # Increase marginBottom to 30px
             ),  
             html.H2(
@@ -608,11 +893,24 @@ def render_content(tab):
     html.Div(id='aglp1-graph-container')  # Ensure correct alignment here
         ])
     ])
-    
+
+    elif tab == 'tab-comparison':
+        # Aggregates for both products, computed once per dataset version
+        aggregates = compute_comparison_aggregates_cached(DATASET_VERSION)
+
+        return html.Div([
+            html.H3('Comparison of Insulin and aGLP-1 Cases'),
+            html.Div([
+                html.Div(dcc.Graph(figure=create_plotly_comparison_line_graph(aggregates)), style={'width': '50%', 'display': 'inline-block', 'padding': '20px'}),
+                html.Div(dcc.Graph(figure=create_plotly_comparison_method_graph(aggregates)), style={'width': '50%', 'display': 'inline-block', 'padding': '20px'}),
+            ], style={'display': 'flex', 'justifyContent': 'space-between'}),
+            html.Div(dcc.Graph(figure=create_plotly_comparison_case_sex_graph(aggregates)), style={'width': '90%', 'margin': '0 auto'})
+        ])
+
     elif tab == 'tab-about':
         return html.Div([
             html.Img(
-                src='https://www.iqviamedicalsalescareers.com/img/d49b1e82-4816-4370-536b-08da8113e407', 
+                **asset_image_props('about-banner', sizes='85vw'),
                 style={'width': '100%', 'height': '400px', 'objectFit': 'cover', 'marginBottom': '50px'}  # Increase marginBottom to 30px
             ),  
             html.H2(
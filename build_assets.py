@@ -0,0 +1,112 @@
+import os
+import sys
+import io
+import json
+import shutil
+import hashlib
+import tempfile
+import urllib.request
+from PIL import Image
+
+# Folder served by Dash and folder where the vendored images are written
+ASSETS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+IMAGES_FOLDER = os.path.join(ASSETS_FOLDER, 'img')
+MANIFEST_PATH = os.path.join(IMAGES_FOLDER, 'manifest.json')
+
+# Remote images used by the layout (name -> original URL)
+IMAGE_SOURCES = {
+    'logo': 'https://ilis.univ-lille.fr/_assets/cf96958808510cb4a29e461391f0eb9e/assets/img/logo-topbar.svg',
+    'overview-banner': 'https://www.diabeteswellness.no/media/wdcofqsq/injection-pen-with-needle.jpg?center=0.673146441088387,0.489979936985788&mode=crop&width=1200&height=630&rnd=133644018985000000',
+    'about-banner': 'https://www.iqviamedicalsalescareers.com/img/d49b1e82-4816-4370-536b-08da8113e407',
+}
+
+# Widths of the resized variants for the banners (shown 400px high, full content width)
+BANNER_WIDTHS = [640, 1024, 1600]
+
+# JPEG compression settings for the resized variants
+JPEG_QUALITY = 80
+
+
+# Function to download one image
+def download(url):
+    request = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+# Function to write bytes under a content-hash filename and return that filename
+def write_fingerprinted(folder, name, extension, content):
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    filename = f'{name}.{digest}.{extension}'
+    with open(os.path.join(folder, filename), 'wb') as file:
+        file.write(content)
+    return filename
+
+
+# Function to resize a raster image to a given width and compress it as progressive JPEG
+def resize_to_jpeg(image, width):
+    if image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+# Function to vendor one image and return its manifest entry
+def build_image(folder, name, url):
+    content = download(url)
+
+    # SVG files are copied as they are
+    if content.lstrip().startswith(b'<') and b'<svg' in content[:1024]:
+        return {'src': write_fingerprinted(folder, name, 'svg', content)}
+
+    image = Image.open(io.BytesIO(content)).convert('RGB')
+    widths = sorted({min(width, image.width) for width in BANNER_WIDTHS})
+    variants = [(write_fingerprinted(folder, f'{name}-{width}w', 'jpg', resize_to_jpeg(image, width)), width) for width in widths]
+
+    return {
+        'src': variants[-1][0],  # Largest variant is the default source
+        'srcset': [[filename, width] for filename, width in variants],
+    }
+
+
+# Function to build every image and write the manifest read by app.py
+# (files of previous builds are kept unless prune is set, since running workers may still link to them)
+def build_assets(prune=False):
+    os.makedirs(IMAGES_FOLDER, exist_ok=True)
+
+    # Build into a temporary folder first, so a failed download leaves the previous build untouched
+    build_folder = tempfile.mkdtemp(dir=ASSETS_FOLDER)
+    try:
+        manifest = {name: build_image(build_folder, name, url) for name, url in IMAGE_SOURCES.items()}
+
+        for filename in os.listdir(build_folder):
+            os.replace(os.path.join(build_folder, filename), os.path.join(IMAGES_FOLDER, filename))
+    finally:
+        shutil.rmtree(build_folder, ignore_errors=True)
+
+    # Write the new manifest atomically (a unique temporary name, as several workers may build at once)
+    manifest_fd, manifest_tmp = tempfile.mkstemp(dir=IMAGES_FOLDER, suffix='.json.tmp')
+    with os.fdopen(manifest_fd, 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(manifest_tmp, MANIFEST_PATH)
+
+    if not prune:
+        return manifest
+
+    # Remove the files of previous builds (only once no running worker still uses the old manifest)
+    kept = {'manifest.json'}
+    for entry in manifest.values():
+        kept.add(entry['src'])
+        kept.update(filename for filename, width in entry.get('srcset', []))
+    for filename in os.listdir(IMAGES_FOLDER):
+        path = os.path.join(IMAGES_FOLDER, filename)
+        if filename not in kept and os.path.isfile(path):
+            os.remove(path)
+
+    return manifest
+
+
+if __name__ == '__main__':
+    for name, entry in build_assets(prune='--prune' in sys.argv[1:]).items():
+        print(name, '->', entry['src'])